@@ -2,74 +2,107 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import joblib
-import tempfile
-import os
-import pdfplumber  # For PDF text extraction
+import io
+import functools
+import numpy as np
+import pandas as pd
+
+# Control/high bytes left over from decoding binary .doc content, mapped to spaces
+_DOC_TRANSLATE = dict.fromkeys(
+    [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), *range(0x7F, 0x100)], ' '
+)
+
+# Stop reading PDF pages once this much text is collected (plenty for the classifier)
+_PDF_TEXT_BUDGET = 20000
+# CVs are short; pages with huge content streams are graphics, not text
+_PDF_MAX_PAGES = 20
+_PDF_MAX_PAGE_BYTES = 2_000_000
+
+# Bound the shared caches so CV contents don't pile up in server memory
+_CACHE_MAX_ENTRIES = 32
+_CACHE_TTL = 3600  # seconds
 
 # Load model
 @st.cache_resource
 def load_model():
-    return joblib.load('cv_classifier_nb.pkl')
+    model_data = joblib.load('cv_classifier_nb.pkl')
+    
+    # Read-only after loading; float32 halves the resident size of these arrays
+    # (scipy still upcasts them to float64 against the TF-IDF matrix at predict time)
+    nb = model_data['pipeline'].named_steps['model']
+    nb.feature_log_prob_ = nb.feature_log_prob_.astype(np.float32)
+    nb.class_log_prior_ = nb.class_log_prior_.astype(np.float32)
+    return model_data
 
 model_data = load_model()
 pipeline = model_data['pipeline']
+CLASSES = pipeline.classes_
+vectorizer = pipeline.named_steps['tfidf']
+nb_model = pipeline.named_steps['model']
+
+# Parser libraries are imported on first upload, keeping paste-only sessions light
+@functools.lru_cache(maxsize = 1)
+def _pdf():
+    import fitz  # PyMuPDF, for PDF text extraction
+    # Don't write MuPDF's per-object diagnostics to stderr for malformed PDFs
+    fitz.TOOLS.mupdf_display_errors(False)
+    fitz.TOOLS.mupdf_display_warnings(False)
+    return fitz
+
+@functools.lru_cache(maxsize = 1)
+def _docx():
+    from docx import Document
+    return Document
 
 # To extract text from files
-def extract_text_from_file(uploaded_file):
-    "Extract text from .docx, .doc, .pdf files"
+# Cached on the raw bytes, so Streamlit reruns don't re-parse the same upload
+@st.cache_data(show_spinner = False, max_entries = _CACHE_MAX_ENTRIES, ttl = _CACHE_TTL)
+def extract_text_from_file(raw, file_extension):
+    "Extract text from .docx, .doc, .pdf file contents"
     text = ""
     
-    # Get file extension
-    file_extension = uploaded_file.name.split('.')[-1].lower()
-    
     try:
         
         if file_extension == 'docx':
-            from docx import Document
-            with tempfile.NamedTemporaryFile(delete = False, suffix = '.docx') as tmp:
-                tmp.write(uploaded_file.getbuffer())
-                tmp_path = tmp.name
-            
-            doc = Document(tmp_path)
+            doc = _docx()(io.BytesIO(raw))
             text = '\n'.join([para.text for para in doc.paragraphs])
-            os.unlink(tmp_path)
         
         elif file_extension == 'doc':
             # .doc files - TRY basic extraction, fallback to error
+            # Read the raw bytes as text (works for some .doc files)
+            # UTF-8 decoding, Latin-1 fallback (accepts any byte sequence)
             try:
-                # Read as binary text (works for some .doc files)
-                content = uploaded_file.getvalue()
+                text = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                text = raw.decode('latin-1')
             
-                # UTF-8/Latin-1 decoding
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        text = content.decode(encoding, errors = 'ignore')
-                        # Clean up - remove binary garbage
-                        import re
-                        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\xFF]', ' ', text)
-                        text = ' '.join(text.split())  # Normalize whitespace
-                    
-                        if len(text) > 100:  # If we got reasonable text
-                            return text[:10000]  # Limit length
-                    except:
-                        continue
+            # Clean up - remove binary garbage
+            text = text.translate(_DOC_TRANSLATE)
+            text = ' '.join(text.split())  # Normalize whitespace
             
-                # If decoding failed, return empty with instructions
-                return ""  # Will trigger the error message below
+            if len(text) > 100:  # If we got reasonable text
+                return text[:10000]  # Limit length
             
-            except Exception:
-                return ""  # Empty triggers conversion message
-
+            # If decoding failed, return empty with instructions
+            return ""  # Will trigger the error message below
         
         elif file_extension == 'pdf':
-            with tempfile.NamedTemporaryFile(delete = False, suffix = '.pdf') as tmp:
-                tmp.write(uploaded_file.getbuffer())
-                tmp_path = tmp.name
-            
-            with pdfplumber.open(tmp_path) as pdf:
-                text = '\n'.join([page.extract_text() for page in pdf.pages if page.extract_text()])
-            
-            os.unlink(tmp_path)
+            # PyMuPDF reads straight from memory, no temp file needed
+            parts = []
+            total = 0
+            with _pdf().open(stream = raw, filetype = "pdf") as doc:
+                for page_no in range(min(doc.page_count, _PDF_MAX_PAGES)):
+                    page = doc.load_page(page_no)
+                    if len(page.read_contents()) > _PDF_MAX_PAGE_BYTES:
+                        continue
+                    page_text = page.get_text("text")
+                    if not page_text:
+                        continue
+                    parts.append(page_text)
+                    total += len(page_text)
+                    if total >= _PDF_TEXT_BUDGET:
+                        break
+            text = '\n'.join(parts)
         
         else:
             text = f"Unsupported file format: .{file_extension}"
@@ -79,6 +112,15 @@ def extract_text_from_file(uploaded_file):
     
     return text
 
+# Cached so widget interactions don't re-run the pipeline on unchanged text
+@st.cache_data(show_spinner = False, max_entries = _CACHE_MAX_ENTRIES, ttl = _CACHE_TTL)
+def predict_probabilities(text):
+    "Class probabilities for a CV text, in CLASSES order"
+    # Softmax over the joint log-likelihoods; same result as predict_proba without logsumexp
+    jll = nb_model.predict_joint_log_proba(vectorizer.transform([text]))[0]
+    probs = np.exp(jll - jll.max())
+    return probs / probs.sum()
+
 # App UI
 st.title("CV Classifier")
 st.markdown("Upload a CV file or paste text to classify job category")
@@ -95,7 +137,9 @@ cv_text = ""
 
 if uploaded_file:
     with st.spinner(f"Extractinf the text from {uploaded_file.name}..."):
-        cv_text = extract_text_from_file(uploaded_file)
+        raw = uploaded_file.getvalue()  # Read the upload once, shared by every branch
+        file_extension = uploaded_file.name.split('.')[-1].lower()
+        cv_text = extract_text_from_file(raw, file_extension)
     
     if "Error" not in cv_text and "Unsupported" not in cv_text:
         st.success(f"File loaded: {uploaded_file.name}")
@@ -103,9 +147,9 @@ if uploaded_file:
         # Show file info
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("File Type", f".{uploaded_file.name.split('.')[-1]}")
+            st.metric("File Type", f".{file_extension}")
         with col2:
-            st.metric("File Size", f"{uploaded_file.size / 1024:.1f} KB")
+            st.metric("File Size", f"{len(raw) / 1024:.1f} KB")
         with col3:
             st.metric("Text Length", f"{len(cv_text):,} chars")
         
@@ -126,8 +170,8 @@ if not cv_text and manual_text:
 # Predict when text is provided
 if cv_text and "Error" not in cv_text and "Unsupported" not in cv_text:
     # Predict
-    prediction = pipeline.predict([cv_text])[0]
-    probabilities = pipeline.predict_proba([cv_text])[0]
+    probabilities = predict_probabilities(cv_text)
+    prediction = CLASSES[probabilities.argmax()]  # Same as predict(), without a second pass
     
     # Display results
     st.success(f"**Predicted Category:** {prediction}")
@@ -138,14 +182,19 @@ if cv_text and "Error" not in cv_text and "Unsupported" not in cv_text:
     
     # Show all probabilities
     st.subheader("All Category Probabilities:")
-    for label, prob in zip(pipeline.classes_, probabilities):
-        col1, col2, col3 = st.columns([2, 5, 2])
-        with col1:
-            st.write(f"**{label}**")
-        with col2:
-            st.progress(float(prob))
-        with col3:
-            st.write(f"{prob:.1%}")
+    prob_df = pd.DataFrame(
+        {"Category": CLASSES, "Probability": probabilities * 100}  # Percent, like Confidence
+    ).sort_values("Probability", ascending = False)  # Most likely first
+    st.dataframe(
+        prob_df,
+        hide_index = True,
+        use_container_width = True,
+        column_config = {
+            "Probability": st.column_config.ProgressColumn(
+                "Probability", format = "%.1f%%", min_value = 0.0, max_value = 100.0
+            )
+        }
+    )
 
 
 st.markdown("---")